@@ -0,0 +1,28 @@
+import argparse
+import importlib
+import sys
+
+# subcommand -> script module; only the chosen one is imported, so e.g. `simulate` on a converted
+# trace never loads pandas or matplotlib
+SUBCOMMANDS = {
+    'simulate': 'simulation',
+    'estimate': 'estimator',
+    'popularity': 'popularity',
+    'convert': 'convert',
+    'stream': 'stream',
+    'batch': 'batch',
+    'epoch': 'epoch',
+    'equivalence': 'equivalence',
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='aiot', description='Mobile AIoT write buffer analysis and simulation')
+    parser.add_argument("command", choices=list(SUBCOMMANDS), help='subcommand; `aiot.py <command> -h` for its options')
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    module = importlib.import_module(SUBCOMMANDS[args.command])
+    return module.main(args.args, prog='aiot.py ' + args.command)
+
+if __name__ == "__main__":
+    sys.exit(main())
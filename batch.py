@@ -0,0 +1,120 @@
+import concurrent.futures as cf
+import itertools
+import json
+import os
+import random
+import sqlite3
+import time
+from simulation import simulation, load_trace
+from convert import convert
+from utils.resultcache import trace_digest
+from utils.traceio import strip_compression
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS results (
+    trace TEXT, digest TEXT, config TEXT,
+    stor_flush_cnt INTEGER, stor_io_cnt INTEGER, stor_io_bytes INTEGER, buffer_blocks INTEGER,
+    hit_cnt INTEGER, miss_cnt INTEGER, w_buffer_write_cnt INTEGER,
+    elapsed REAL, finished TEXT,
+    PRIMARY KEY (digest, config)
+);
+CREATE TABLE IF NOT EXISTS inode_results (
+    digest TEXT, config TEXT, inode INTEGER, blocks_written INTEGER, stor_io_cnt INTEGER,
+    PRIMARY KEY (digest, config, inode)
+);'''
+
+def list_traces(source):
+    # a directory of *.csv traces or a manifest with one trace path per line
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, f) for f in os.listdir(source) if strip_compression(f).endswith('.csv'))
+
+    base = os.path.dirname(source)
+    with open(source) as f:
+        return [os.path.join(base, line.strip()) for line in f if line.strip() and not line.startswith('#')]
+
+def param_grid(grid):
+    # {'ratio': [0.05, 0.1], 'seed': [0]} -> [{'ratio': 0.05, 'seed': 0}, {'ratio': 0.1, 'seed': 0}]
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*[grid[n] for n in names])]
+
+def run_job(columns_filename, config):
+    df, stats = load_trace(columns_filename)
+
+    random.seed(config.get('seed'))
+    start = time.perf_counter()
+    s = simulation(df, size=stats['unique'], max_buffer=stats['unique_write'], ratio=config['ratio'], verbose=False)
+
+    return {'stor_flush_cnt': s.stor_flush_cnt, 'stor_io_cnt': s.stor_io_cnt,
+            'stor_io_bytes': s.stor_io_bytes, 'buffer_blocks': len(s.write_buffer.cache),
+            'hit_cnt': s.hit_cnt, 'miss_cnt': s.miss_cnt, 'w_buffer_write_cnt': s.w_buffer_write_cnt,
+            'inode_flush': [(inode, blocks, io_cnt) for inode, (blocks, io_cnt) in s.inode_flush.items()],
+            'elapsed': time.perf_counter() - start}
+
+COLUMNS_DIR = '.trace_columns'
+
+def batch_run(traces, grid, db='results.db', workers=None, columns_dir=COLUMNS_DIR):
+    con = sqlite3.connect(db)
+    con.executescript(SCHEMA)
+
+    # pending (trace, config) pairs, largest traces first so the longest jobs do not start last
+    jobs = []
+    for trace in sorted(traces, key=os.path.getsize, reverse=True):
+        digest = trace_digest(trace)
+        columns = os.path.join(columns_dir, digest + '.npz')    # named by content, outside the (maybe read-only) trace dir
+        if not os.path.exists(columns):
+            os.makedirs(columns_dir, exist_ok=True)
+            convert(trace, columns)    # parse the csv once here; workers load the columns with numpy alone
+        done = {row[0] for row in con.execute('SELECT config FROM results WHERE digest = ?', (digest,))}
+        for config in param_grid(grid):
+            if json.dumps(config, sort_keys=True) not in done:
+                jobs.append((trace, columns, digest, config))
+    print(len(jobs), "pending jobs")
+    print("trace,\tconfig,\tstorage write count,\telapsed")
+
+    with cf.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, columns, config): (trace, digest, config) for trace, columns, digest, config in jobs}
+        for future in cf.as_completed(futures):
+            trace, digest, config = futures[future]
+            try:
+                r = future.result()
+            except Exception as e:    # keep the other jobs running; a rerun retries this one
+                print("failed:", trace, config, repr(e))
+                continue
+
+            with con:    # commit per job, so a crash loses only the running jobs
+                con.execute('INSERT OR REPLACE INTO results VALUES (?,?,?,?,?,?,?,?,?,?,?,datetime("now"))',
+                            (trace, digest, json.dumps(config, sort_keys=True), r['stor_flush_cnt'], r['stor_io_cnt'],
+                             r['stor_io_bytes'], r['buffer_blocks'], r['hit_cnt'], r['miss_cnt'],
+                             r['w_buffer_write_cnt'], r['elapsed']))
+                con.execute('DELETE FROM inode_results WHERE digest = ? AND config = ?', (digest, json.dumps(config, sort_keys=True)))
+                con.executemany('INSERT INTO inode_results VALUES (?,?,?,?,?)',
+                                [(digest, json.dumps(config, sort_keys=True)) + row for row in r['inode_flush']])
+            print(trace, json.dumps(config, sort_keys=True), r['stor_flush_cnt'], round(r['elapsed'], 1), sep=",\t")
+
+    con.close()
+
+#----------------
+def main(argv=None, prog=None):
+    # add parser
+    import argparse
+    parser = argparse.ArgumentParser(prog=prog)
+
+    parser.add_argument("--input", "-i", metavar='I', type=str, required=True,
+                        help='directory of *.csv(.gz/.xz/.zst) traces or manifest file of trace paths')
+    parser.add_argument("--db", metavar='D', type=str,
+                        nargs='?', default='results.db', help='SQLite results database')
+    parser.add_argument("--ratios", metavar='R', type=str,
+                        nargs='?', default=','.join(str(i / 20) for i in range(1, 11)), help='comma-separated write buffer ratios')
+    parser.add_argument("--seeds", metavar='S', type=str,
+                        nargs='?', default='0', help='comma-separated random seeds of the flush order')
+    parser.add_argument("--columns-dir", metavar='C', type=str,
+                        nargs='?', default=COLUMNS_DIR, help='directory of the converted .npz columns of each trace')
+    parser.add_argument("--workers", "-j", metavar='J', type=int, default=None, help='worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    grid = {'ratio': [float(r) for r in args.ratios.split(',')],
+            'seed': [int(s) for s in args.seeds.split(',')]}
+    batch_run(list_traces(args.input), grid, db=args.db, workers=args.workers, columns_dir=args.columns_dir)
+
+if __name__ == "__main__":
+    main()
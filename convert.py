@@ -0,0 +1,35 @@
+import os
+from utils.tracefile import columns_from_frame, save_columns
+from utils.traceio import read_trace
+
+def converted_filename(input_filename):
+    # only the last suffix is replaced: trace.csv -> trace.npz, trace.csv.gz -> trace.csv.npz
+    return os.path.splitext(input_filename)[0] + '.npz'
+
+def convert(input_filename, output_filename=None):
+    # csv trace -> numpy columns that simulation.py and batch.py workers load without pandas
+    if output_filename is None:
+        output_filename = converted_filename(input_filename)
+
+    df = read_trace(input_filename, header=None, skiprows=1)
+    save_columns(output_filename + '.tmp.npz', columns_from_frame(df))
+    os.replace(output_filename + '.tmp.npz', output_filename)    # no half-written columns after a crash
+
+    return output_filename
+
+#----------------
+def main(argv=None, prog=None):
+    # add parser
+    import argparse
+    parser = argparse.ArgumentParser(prog=prog)
+
+    parser.add_argument("--input", "-i", metavar='I', type=str,
+                        nargs='?', default='trace.csv', help='input csv trace path')
+    parser.add_argument("--output", "-o", metavar='O', type=str,
+                        nargs='?', default=None, help='output .npz path (default: input path with its last suffix replaced by .npz)')
+    args = parser.parse_args(argv)
+
+    print(convert(args.input, args.output))
+
+if __name__ == "__main__":
+    main()
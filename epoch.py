@@ -0,0 +1,66 @@
+from utils.traceio import read_trace
+from utils.epochs import flush_epochs, epoch_stats, write_epoch_gaps, gap_distribution, suggest_window_size, write_periodicity
+
+def epoch_run(input_filename, flush_period=5, sort=None, top=None):
+    df = read_trace(input_filename, header=None, skiprows=1)
+    flush_idx, _ = flush_epochs(df[1].to_numpy(), flush_period)
+    stats = epoch_stats(df, flush_idx)
+
+    if sort:
+        stats = stats.sort_values(sort, ascending=False)
+    if top:
+        stats = stats.head(top)
+
+    return stats
+
+def reuse_run(input_filename, flush_period=5, max_gap=16, coverage=0.9, blocks_output=None):
+    df = read_trace(input_filename, header=None, skiprows=1, usecols=[1, 3, 4])
+    flush_idx, _ = flush_epochs(df[1].to_numpy(), flush_period)
+    blknum, _, gap = write_epoch_gaps(df, flush_idx)
+
+    dist = gap_distribution(gap, max_gap=max_gap)
+    print("epoch gap,\trewrite count,\tcumulative share")
+    for row in dist.itertuples():
+        print(row.gap, row.count, round(row.cumulative, 4), sep=",\t")
+
+    print("writes", len(gap), sep=",\t")
+    print("first writes", (gap == -1).sum(), sep=",\t")
+    print("same-epoch rewrites", (gap == 0).sum(), sep=",\t")
+    print("window_size for " + str(coverage) + " coverage", suggest_window_size(gap, coverage), sep=",\t")
+
+    if blocks_output:
+        write_periodicity(blknum, gap).to_csv(blocks_output)
+
+#----------------
+def main(argv=None, prog=None):
+    # add parser
+    import argparse
+    parser = argparse.ArgumentParser(prog=prog)
+
+    parser.add_argument("--input", "-i", metavar='I', type=str,
+                        nargs='?', default='trace.csv', help='input file path')
+    parser.add_argument("--output", "-o", metavar='O', type=str,
+                        nargs='?', default=None, help='output csv path (default: stdout)')
+    parser.add_argument("--flush-period", metavar='F', type=float, default=5, help='flush period in seconds')
+    parser.add_argument("--sort", metavar='S', type=str, default=None,
+                        choices=['events', 'writes', 'dirty_blocks', 'rewrite_ratio'], help='sort epochs by this column')
+    parser.add_argument("--top", metavar='N', type=int, default=None, help='print only the first N epochs')
+    parser.add_argument("--reuse", action='store_true', help='write reuse analysis across flush epochs instead of per-epoch stats')
+    parser.add_argument("--max-gap", metavar='G', type=int, default=16, help='largest epoch gap printed by --reuse')
+    parser.add_argument("--coverage", metavar='C', type=float, default=0.9, help='rewrite share the suggested window_size must see')
+    parser.add_argument("--blocks-output", metavar='B', type=str, default=None, help='per-block write periodicity csv path (--reuse)')
+    args = parser.parse_args(argv)
+
+    if args.reuse:
+        reuse_run(args.input, flush_period=args.flush_period, max_gap=args.max_gap, coverage=args.coverage,
+                  blocks_output=args.blocks_output)
+        return
+
+    stats = epoch_run(args.input, flush_period=args.flush_period, sort=args.sort, top=args.top)
+    if args.output:
+        stats.to_csv(args.output)
+    else:
+        print(stats.to_csv(sep='\t', float_format='%.3f'), end='')
+
+if __name__ == "__main__":
+    main()
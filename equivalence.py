@@ -0,0 +1,233 @@
+import importlib
+import math
+import random
+import time
+import numpy as np
+import pandas as pd
+from utils.epochs import flush_epochs
+
+#-----
+def synthetic_trace(kind, n, n_blocks, seed, write_ratio=0.5, blocks_per_inode=8):
+    '''
+    Seeded trace in the positional layout simulation.py reads (1 rtime, 3 operation, 4 blocknum, 5 inode)
+    * zipf: skewed popularity
+    * loop: repeated sequential scans over a working set, with some random accesses
+    * burst: write bursts over contiguous ranges separated by idle gaps
+    '''
+    rng = np.random.default_rng(seed)
+
+    if kind == 'zipf':
+        blknum = rng.zipf(1.2, n) % n_blocks
+        rtime = np.sort(rng.uniform(0, n / 40, n))
+        write = rng.random(n) < write_ratio
+    elif kind == 'loop':
+        blknum = np.arange(n) % max(1, n_blocks // 3)
+        rand = rng.random(n) < 0.2
+        blknum[rand] = rng.integers(0, n_blocks, rand.sum())
+        rtime = np.sort(rng.uniform(0, n / 40, n))
+        write = rng.random(n) < write_ratio
+    elif kind == 'burst':
+        starts = rng.integers(0, n_blocks, n // 64 + 1)
+        blknum = (np.repeat(starts, 64) + np.tile(np.arange(64), len(starts)))[:n] % n_blocks
+        gaps = np.where(np.arange(n) % 64 == 0, rng.exponential(4, n), rng.exponential(0.005, n))
+        rtime = np.cumsum(gaps)
+        write = rng.random(n) < max(write_ratio, 0.8)
+    else:
+        raise ValueError(kind)
+
+    return pd.DataFrame({0: np.arange(n), 1: rtime, 2: 0, 3: np.where(write, 'write', 'read'),
+                         4: blknum.astype(np.int64), 5: blknum.astype(np.int64) // blocks_per_inode})
+
+def replay_events(df, flush_period=5):
+    '''
+    The event order of simulation.simulation: ('flush', vtime, rtime) and ('ref', vtime, rtime, op, blknum, inode).
+    Flushes follow the original per-event rule, not utils.epochs, so the oracle does not depend on optimized code.
+    '''
+    flush_rtime, last_rtime, index = 0, 0, -1
+    for index, rtime, operation, blknum, inode in zip(df.index, df[1], df[3], df[4], df[5]):
+        if rtime >= flush_period and (int(rtime - flush_rtime) >= flush_period or int(rtime - last_rtime) >= flush_period):
+            yield ('flush', index, flush_rtime + flush_period)
+            flush_rtime = math.floor(rtime) - (math.floor(rtime) % flush_period)
+
+        yield ('ref', index, rtime, operation, blknum, inode)
+        last_rtime = rtime
+
+    yield ('flush', index + 1, last_rtime)
+
+def check_flush_epochs(df, flush_period=5):
+    # the precomputed flush schedule of simulation.py must match the per-event rule of `replay_events`
+    expected, position = [], 0
+    for event in replay_events(df, flush_period):
+        if event[0] == 'ref':
+            position += 1
+        else:
+            expected.append((position, event[2]))
+
+    flush_idx, flush_rtimes = flush_epochs(df[1].to_numpy(), flush_period)
+    return expected[:-1] == list(zip(flush_idx.tolist(), flush_rtimes.tolist()))    # the last flush ends the replay
+
+#-----
+class Replayer:
+    def __init__(self, module, size, max_buffer, ratio):
+        self.s = importlib.import_module(module).FileCache(max_cache_size=size, write_buffer_max=max_buffer, ratio=ratio)
+        self.evicted = []    # (cache, addr) since the last event
+        for name, cache in [('buffer_cache', self.s.buffer_cache), ('write_buffer', self.s.write_buffer)]:
+            cache.evict = self.recording(name, cache.evict)    # instance attribute: also catches internal self.evict()
+
+    def recording(self, name, evict):
+        def evict_and_record():
+            victim = evict()
+            self.evicted.append((name, None if victim is None else victim.addr))
+            return victim
+        return evict_and_record
+
+    def apply(self, event):
+        self.evicted = []
+        if event[0] == 'flush':
+            f = self.s.flush(cur_vtime=event[1], cur_rtime=event[2])
+            flushed = -1 if f == -1 else [b.addr for b in f]
+        else:
+            self.s.reference(cur_vtime=event[1], cur_rtime=event[2], operation=event[3], blknum=event[4], inode=event[5])
+            flushed = None
+
+        s = self.s
+        return {'flushed': flushed, 'evicted': self.evicted,
+                'counters': (s.hit_cnt, s.miss_cnt, s.stor_flush_cnt, s.w_buffer_write_cnt,
+                             len(s.buffer_cache), len(s.write_buffer), s.stor_io_cnt, s.stor_io_bytes, s.inode_flush)}
+
+def cache_sizes(df, cache_ratio=1.0):
+    # buffer cache of `cache_ratio` x the working set (< 1 exercises buffer cache eviction), write buffer base
+    return max(1, round(cache_ratio * df[4].nunique())), max(1, df[df[3] == 'write'][4].nunique())
+
+def compare(reference, candidate, df, ratio, seed, cache_ratio=1.0):
+    size, max_buffer = cache_sizes(df, cache_ratio)
+    ref = Replayer(reference, size, max_buffer, ratio)
+    cand = Replayer(candidate, size, max_buffer, ratio)
+
+    random.seed(seed)
+    for i, event in enumerate(replay_events(df)):
+        state = random.getstate()    # both sides must draw the same flush order
+        expected = ref.apply(event)
+        random.setstate(state)
+        actual = cand.apply(event)
+
+        if expected != actual:
+            return {'event': i, 'kind': event, 'expected': expected, 'actual': actual}
+
+    return None
+
+def timed_run(module, df, ratio, seed, cache_ratio=1.0):
+    size, max_buffer = cache_sizes(df, cache_ratio)
+    s = importlib.import_module(module).FileCache(max_cache_size=size, write_buffer_max=max_buffer, ratio=ratio)
+
+    random.seed(seed)
+    start = time.perf_counter()
+    for event in replay_events(df):
+        if event[0] == 'flush':
+            s.flush(cur_vtime=event[1], cur_rtime=event[2])
+        else:
+            s.reference(cur_vtime=event[1], cur_rtime=event[2], operation=event[3], blknum=event[4], inode=event[5])
+
+    return time.perf_counter() - start
+
+#-----
+ESTIMATORS = {'lru': ('recency', 'LRUCache'), 'lfu': ('frequency', 'LFUCacheList')}    # estimator.py's rank structures
+
+def estimator_class(package, name):
+    module, cls = ESTIMATORS[name]
+    return getattr(importlib.import_module(package + '.' + module), cls)
+
+def compare_estimator(reference, candidate, name, df):
+    # the rank estimator.py counts for every reference, and the structure size
+    ref, cand = estimator_class(reference, name)(), estimator_class(candidate, name)()
+    for i, blknum in enumerate(df[4].tolist()):
+        expected = (ref.reference(blknum), len(ref))
+        actual = (cand.reference(blknum), len(cand))
+        if expected != actual:
+            return {'event': i, 'kind': ('ref', blknum), 'expected': expected, 'actual': actual}
+
+    return None
+
+def timed_estimator(package, name, df):
+    ref_block = estimator_class(package, name)()
+    start = time.perf_counter()
+    for blknum in df[4].tolist():
+        ref_block.reference(blknum)
+    return time.perf_counter() - start
+
+def print_result(row, mismatch, ref_time, cand_time):
+    print(*row, 'ok' if mismatch is None else 'MISMATCH', round(ref_time, 2), round(cand_time, 2),
+          round(ref_time / cand_time, 2), sep=",\t")
+
+    if mismatch is not None:
+        print("  first difference at event", mismatch['event'], mismatch['kind'])
+        print("  expected:", mismatch['expected'])
+        print("  actual:  ", mismatch['actual'])
+
+def equivalence_run(reference, candidate, kinds, seeds, ratios, n, n_blocks, cache_ratios=(1.0,),
+                    estimator_reference='utils.reference', estimator_candidate='utils', estimators=('lru', 'lfu')):
+    mismatches = 0
+    traces = [(kind, seed, synthetic_trace(kind, n, n_blocks, seed)) for kind in kinds for seed in seeds]
+
+    print("trace,\tseed,\tcache ratio,\tratio,\tresult,\treference s,\tcandidate s,\tspeed-up")
+    for kind, seed, df in traces:
+        if not check_flush_epochs(df):
+            mismatches += 1
+            print(kind, seed, '-', '-', 'MISMATCH', sep=",\t")
+            print("  flush_epochs differs from the per-event flush rule")
+
+        for cache_ratio in cache_ratios:
+            for ratio in ratios:
+                mismatch = compare(reference, candidate, df, ratio, seed, cache_ratio)
+                ref_time = timed_run(reference, df, ratio, seed, cache_ratio)
+                cand_time = timed_run(candidate, df, ratio, seed, cache_ratio)
+                print_result([kind, seed, cache_ratio, ratio], mismatch, ref_time, cand_time)
+                mismatches += mismatch is not None
+
+    if len(estimators):
+        print("trace,\tseed,\testimator,\tresult,\treference s,\tcandidate s,\tspeed-up")
+    for kind, seed, df in traces:
+        for name in estimators:
+            mismatch = compare_estimator(estimator_reference, estimator_candidate, name, df)
+            ref_time = timed_estimator(estimator_reference, name, df)
+            cand_time = timed_estimator(estimator_candidate, name, df)
+            print_result([kind, seed, name], mismatch, ref_time, cand_time)
+            mismatches += mismatch is not None
+
+    return mismatches
+
+#----------------
+def main(argv=None, prog=None):
+    # add parser
+    import argparse
+    parser = argparse.ArgumentParser(prog=prog)
+
+    parser.add_argument("--reference", metavar='R', type=str,
+                        nargs='?', default='utils.reference.filecache', help='oracle FileCache module')
+    parser.add_argument("--candidate", metavar='C', type=str,
+                        nargs='?', default='utils.filecache', help='FileCache module under test')
+    parser.add_argument("--kinds", metavar='K', type=str,
+                        nargs='?', default='zipf,loop,burst', help='comma-separated synthetic trace kinds')
+    parser.add_argument("--seeds", metavar='S', type=str, nargs='?', default='0,1', help='comma-separated seeds')
+    parser.add_argument("--ratios", metavar='R', type=str, nargs='?', default='0.05,0.25', help='comma-separated write buffer ratios')
+    parser.add_argument("--cache-ratios", metavar='F', type=str, nargs='?', default='1.0,0.5',
+                        help='comma-separated buffer cache sizes as a fraction of the working set (< 1 evicts)')
+    parser.add_argument("--estimator-reference", metavar='P', type=str,
+                        nargs='?', default='utils.reference', help='package of the oracle recency/frequency modules')
+    parser.add_argument("--estimator-candidate", metavar='P', type=str,
+                        nargs='?', default='utils', help='package of the recency/frequency modules under test')
+    parser.add_argument("--estimators", metavar='E', type=str,
+                        nargs='?', default='lru,lfu', help='comma-separated estimators to compare (empty: none)')
+    parser.add_argument("--events", "-n", metavar='N', type=int, default=20000, help='events per trace')
+    parser.add_argument("--blocks", metavar='B', type=int, default=2000, help='block address space per trace')
+    args = parser.parse_args(argv)
+
+    mismatches = equivalence_run(args.reference, args.candidate, args.kinds.split(','),
+                                 [int(s) for s in args.seeds.split(',')], [float(r) for r in args.ratios.split(',')],
+                                 args.events, args.blocks, [float(f) for f in args.cache_ratios.split(',')],
+                                 args.estimator_reference, args.estimator_candidate,
+                                 [e for e in args.estimators.split(',') if e])
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
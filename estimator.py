@@ -1,9 +1,11 @@
 import multiprocessing as mp
-import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
 from utils.recency import LRUCache
 from utils.frequency import LFUCacheList
 from utils.checkpoint import load_json, save_json
+from utils.resultcache import memoize, CACHE_DIR
+from utils.downsample import log_bin_scatter, MAX_POINTS
+from utils.traceio import read_trace
 
 def estimator(df, block_rank, ref_cnt):
     for index, row in df.iterrows():  ### one by one
@@ -37,10 +39,10 @@ def mp_estimator(ref_block, startpoint, endpoint_q, input_filename, output_filen
     i = startpoint
     while True:
         if not startpoint:
-            df = pd.read_csv(input_filename, sep=',', header=0, index_col=None, on_bad_lines='skip')
+            df = read_trace(input_filename, sep=',', header=0, index_col=None, on_bad_lines='skip')
         else:
             try:
-                df = pd.read_csv(input_filename + '_' + str(i), sep=',', header=0, index_col=0, on_bad_lines='skip')
+                df = read_trace(input_filename + '_' + str(i), sep=',', header=0, index_col=0, on_bad_lines='skip')
             except FileNotFoundError:
                 print("no file named:", input_filename + '_' + str(i))
                 break
@@ -95,8 +97,17 @@ def estimator_run(estimator_type, start_chunk, input_filename, output_filename):
     _, ref_cnt = load_json(['block_rank', 'ref_cnt'], filename)
     ref_cnts.append(ref_cnt)
 
-def estimator_graph(recency_cnt, frequency_cnt, title, filename, xlim : list = None, ylim : list = None):
+def estimator_analysis(estimator_type, input_filename, output_filename, cache_dir=CACHE_DIR):
+    def compute():
+        estimator_run(estimator_type=estimator_type, start_chunk=0, input_filename=input_filename, output_filename=output_filename)
+        _, ref_cnt = load_json(['block_rank', 'ref_cnt'], output_filename + '-' + estimator_type + '_estimator.json')
+        return {'ref_cnt': np.array(ref_cnt, dtype=np.int64)}
+
+    return memoize(input_filename, estimator_type + '_estimator', {}, compute, cache_dir=cache_dir)['ref_cnt']
+
+def estimator_graph(recency_cnt, frequency_cnt, title, filename, xlim : list = None, ylim : list = None, max_points=MAX_POINTS):
     #fig, ax = plot_frame((1, 1), title=title, xlabel='File block rank', ylabel='Reference counts', log_scale=False)
+    import matplotlib.pyplot as plt    # only for figures, not for the analyses
     plt.rc('font', size=20)
     fig, ax = plt.subplots(1,1, figsize=(7,7), constrained_layout=True)
     ax.set_xlabel('File block rank', fontsize=25)
@@ -115,12 +126,10 @@ def estimator_graph(recency_cnt, frequency_cnt, title, filename, xlim : list = N
         plt.setp(ax, ylim=ylim)
 
     #recency
-    x1 = range(1,len(recency_cnt)+1)
-    y1 = recency_cnt
+    x1, y1 = log_bin_scatter(recency_cnt, max_points=max_points)
 
     #frequency
-    x2 = range(1,len(frequency_cnt)+1)
-    y2 = frequency_cnt
+    x2, y2 = log_bin_scatter(frequency_cnt, max_points=max_points)
 
     # colors: ['royalblue', 'crimson'], ['#006b70', '#ff7c00'], ['purple', 'darkgreen']
     ax.scatter(x1, y1, color='#006b70', alpha=0.7, marker='o', label='recency')       # recency graph
@@ -133,10 +142,10 @@ def estimator_graph(recency_cnt, frequency_cnt, title, filename, xlim : list = N
     plt.savefig(filename+'-estimator.png', dpi=300)
 
 #----------------
-if __name__=="__main__":
+def main(argv=None, prog=None):
     # add parser
     import argparse
-    parser = argparse.ArgumentParser()
+    parser = argparse.ArgumentParser(prog=prog)
 
     parser.add_argument("--input", "-i", metavar='I', type=str,
                         nargs='?', default='trace.csv', help='input file path')
@@ -144,17 +153,20 @@ if __name__=="__main__":
                         nargs='?', default='output', help='output file path')
     parser.add_argument("--title", "-t", metavar='T', type=str,
                         nargs='?', default='', help='title of figures')
-    args = parser.parse_args()
+    parser.add_argument("--cache-dir", metavar='D', type=str,
+                        nargs='?', default=CACHE_DIR, help='analysis result cache directory')
+    parser.add_argument("--no-cache", action='store_true', help='recompute without the result cache')
+    parser.add_argument("--max-points", metavar='P', type=int,
+                        nargs='?', default=MAX_POINTS, help='max points drawn per series (0: all)')
+    args = parser.parse_args(argv)
 
     #-----
-    suffix = "_estimator"
-    for et in ['recency', 'frequency']:
-        estimator_run(estimator_type=et, start_chunk=0, input_filename=args.input, output_filename=args.output)
-
-    recency_filename = args.output + '-recency' + suffix + '.json'
-    _, recency_ref_cnt = load_json(['block_rank', 'ref_cnt'], recency_filename)
+    cache_dir = None if args.no_cache else args.cache_dir
+    recency_ref_cnt = estimator_analysis('recency', args.input, args.output, cache_dir=cache_dir)
+    frequency_ref_cnt = estimator_analysis('frequency', args.input, args.output, cache_dir=cache_dir)
 
-    frequency_filename = args.output + '-frequency' + suffix + '.json'
-    _, frequency_ref_cnt = load_json(['block_rank', 'ref_cnt'], frequency_filename)
+    estimator_graph(recency_cnt=recency_ref_cnt, frequency_cnt=frequency_ref_cnt, title=args.title, filename=args.output,
+                    max_points=args.max_points or None)
 
-    estimator_graph(recency_cnt=recency_ref_cnt, frequency_cnt=frequency_ref_cnt, title=args.title, filename=args.output)
+if __name__ == "__main__":
+    main()
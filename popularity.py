@@ -1,7 +1,11 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import math
+from utils.resultcache import memoize, CACHE_DIR
+from utils.downsample import decimate_line, MAX_POINTS
+from utils.sketch import HeavyHitters, DistinctCounter
+from utils.tracestats import trace_stats
+from utils.traceio import read_trace_chunks
 
 def ref_cnt_per_block(df_list):
     df = pd.DataFrame()
@@ -16,9 +20,12 @@ def ref_cnt_per_block(df_list):
     return df
 
 #-----
-def ref_cnt_percentile_rank(df):
-    total_read = df['count'][(df['operation'] == 'read')].sum()
-    total_write = df['count'][(df['operation'] == 'write')].sum()
+def ref_cnt_percentile_rank(df, stats=None):
+    if stats is None:
+        total_read = df['count'][(df['operation'] == 'read')].sum()
+        total_write = df['count'][(df['operation'] == 'write')].sum()
+    else:
+        total_read, total_write = stats['events_read'], stats['events_write']
 
     # percentage
     df['op_pcnt'] = df['count'].astype('float64')
@@ -34,9 +41,80 @@ def ref_cnt_percentile_rank(df):
 
     return df
 
+def popularity_analysis(input_filename, cache_dir=CACHE_DIR):
+    def compute():
+        df_chunk = read_trace_chunks(input_filename, sep=',', chunksize=1000000, header=0, index_col=0, on_bad_lines='skip')
+        df = ref_cnt_percentile_rank(ref_cnt_per_block(df_list=list(df_chunk)), stats=trace_stats(input_filename))
+        return {col: df[col].to_numpy(dtype=str if col == 'operation' else None) for col in df.columns}
+
+    arrays = memoize(input_filename, 'popularity', {}, compute, cache_dir=cache_dir)
+    return pd.DataFrame(arrays)
+
+#-----
+def sketch_ref_cnt(input_filename, k, operations=('read', 'write'), stats=None):
+    '''
+    Bounded-memory CDF of `cdf_curves` form in two streaming passes over the trace.
+    1st pass: a HeavyHitters summary of k counters and a DistinctCounter per operation.
+    2nd pass: exact counts of the k candidates only.
+    The head -- blocks whose exact count exceeds the summary error (<= total/(k+1)) -- is exact,
+    since every other block has a count <= error. The remaining mass is spread evenly over the
+    remaining unique blocks -- exact from `stats` (see utils/tracestats.py), otherwise estimated
+    with relative error ~1/sqrt(4096) on the rank axis -- which
+    draws the tail as a straight line below the true, concave, CDF.
+    '''
+    def read_chunks():
+        return read_trace_chunks(input_filename, sep=',', chunksize=1000000, header=0, on_bad_lines='skip',
+                           usecols=['blocknum', 'operation'])
+
+    hh = {op: HeavyHitters(k) for op in operations}
+    distinct = {op: DistinctCounter() for op in operations}
+    for chunk in read_chunks():
+        for op in operations:
+            blknums = chunk['blocknum'][chunk['operation'] == op]
+            hh[op].update(blknums.value_counts())
+            distinct[op].update(blknums.unique())
+
+    exact = {op: pd.Series(dtype='int64') for op in operations}
+    for chunk in read_chunks():
+        for op in operations:
+            blknums = chunk['blocknum'][(chunk['operation'] == op) & chunk['blocknum'].isin(hh[op].candidates())]
+            exact[op] = exact[op].add(blknums.value_counts(), fill_value=0).astype('int64')
+
+    curves = []
+    print("operation,\ttotal count,\tunique blocks (est.),\texact head blocks,\tcount error bound")
+    for op in operations:
+        head = np.sort(exact[op][exact[op] > hh[op].error].to_numpy())[::-1]
+        total = hh[op].total
+        if head.sum() == total:    # every block is in the head
+            n_blocks = len(head)
+            x_l = np.arange(n_blocks) / n_blocks * 100
+            y_l = np.cumsum(head) / total * 100
+        else:
+            n_unique = distinct[op].estimate() if stats is None else stats['unique_' + op]
+            n_blocks = max(n_unique, len(head) + 1)
+            x_l = np.append(np.arange(len(head)), n_blocks - 1) / n_blocks * 100
+            y_l = np.append(np.cumsum(head), total) / total * 100
+        curves.append((x_l, y_l))
+        print(op, total, n_blocks, len(head), hh[op].error, sep=",\t")
+
+    return curves
+
 #-----
-def cdf_graph(df, fig_title, filename):
+def cdf_curves(df, operations=('read', 'write')):
+    # calculate CDF for each operation
+    curves = []
+    for op in operations:
+        cur_cdf = df['op_pcnt'][(df['operation'] == op)].sort_values(ascending=False).cumsum().to_numpy()
+
+        x_l = np.arange(len(cur_cdf)) / len(cur_cdf) * 100
+        y_l = cur_cdf * 100
+        curves.append((x_l, y_l))
+
+    return curves
+
+def cdf_graph(df, fig_title, filename, max_points=MAX_POINTS, curves=None):
     #fig, ax = plot_frame((1, 1), title=fig_title, xlabel='Rank by reference count (%)', ylabel='Cumulative access ratio (%)')
+    import matplotlib.pyplot as plt    # only for figures, not for the analyses
     plt.rc('font', size=20)
     fig, ax = plt.subplots(1,1, figsize=(7,7), constrained_layout=True)
     ax.set_xlabel('Rank by reference count (%)', fontsize=25)
@@ -45,25 +123,15 @@ def cdf_graph(df, fig_title, filename):
     ax.set_axisbelow(True)
     ax.grid(True, color='black', alpha=0.5, linestyle='--')
 
-    # calculate CDF for each operation
-    x_list, y_list = [], []
-    operations = ['read', 'write']
-    for op in operations:
-        cur_cdf = df['op_pcnt'][(df['operation'] == op)].sort_values(ascending=False).cumsum().to_numpy()
-        cur_cdf_rank = df['op_pcnt_rank'][(df['operation'] == op)].sort_values(ascending=True).to_numpy()
-        cur_x = np.concatenate(([0, cur_cdf_rank[0]], cur_cdf_rank, [1]))
-        cur_y = np.concatenate(([0, 0], cur_cdf, [1]))
-
-        x_list.append(cur_x)
-        y_list.append(cur_y)
+    if curves is None:
+        curves = cdf_curves(df)
 
     # plot
     colors = ['blue', 'red']
     dash_colors = ['darkblue', 'brown']
     labels = ['read', 'write']
-    for i in range(len(operations)):
-        x_l = np.arange(len(x_list[i])-3) / (len(x_list[i])-3) * 100
-        y_l = y_list[i][2:-1] * 100
+    for i in range(len(curves)):
+        x_l, y_l = decimate_line(*curves[i], max_points=max_points)
 
         ax.plot(x_l, y_l, color=dash_colors[i], label=labels[i], lw=3)
 
@@ -73,10 +141,10 @@ def cdf_graph(df, fig_title, filename):
     #plt.show()
     plt.savefig(filename+'_cdf.png', dpi=300)
 
-if __name__ == '__main__':
+def main(argv=None, prog=None):
     # add parser
     import argparse
-    parser = argparse.ArgumentParser()
+    parser = argparse.ArgumentParser(prog=prog)
 
     parser.add_argument("--input", "-i", metavar='I', type=str,
                         nargs='?', default='trace.csv', help='input file path')
@@ -84,7 +152,14 @@ if __name__ == '__main__':
                         nargs='?', default='output', help='output file path')
     parser.add_argument("--title", "-t", metavar='T', type=str,
                         nargs='?', default='', help='title of figures')
-    args = parser.parse_args()
+    parser.add_argument("--cache-dir", metavar='D', type=str,
+                        nargs='?', default=CACHE_DIR, help='analysis result cache directory')
+    parser.add_argument("--max-points", metavar='P', type=int,
+                        nargs='?', default=MAX_POINTS, help='max points drawn per series (0: all)')
+    parser.add_argument("--no-cache", action='store_true', help='recompute without the result cache')
+    parser.add_argument("--sketch", metavar='K', type=int,
+                        nargs='?', default=0, help='bounded-memory mode with K heavy-hitter counters per operation (0: exact)')
+    args = parser.parse_args(argv)
 
     # check if the output path exists
     import os
@@ -92,8 +167,13 @@ if __name__ == '__main__':
         os.makedirs(args.output)
         print(f"Make directory: {args.output}")
 
-    df_chunk = pd.read_csv(args.input, sep=',', chunksize=1000000, header=0, index_col=0, on_bad_lines='skip')
-    df1 = ref_cnt_per_block(df_list=list(df_chunk))
+    if args.sketch:
+        cdf_graph(df=None, fig_title=args.title, filename=args.output, max_points=args.max_points or None,
+                  curves=sketch_ref_cnt(args.input, k=args.sketch,
+                                        stats=trace_stats(args.input) if os.path.exists(args.input + '.stats.npz') else None))
+    else:
+        df2 = popularity_analysis(args.input, cache_dir=None if args.no_cache else args.cache_dir)
+        cdf_graph(df=df2, fig_title=args.title, filename=args.output, max_points=args.max_points or None)
 
-    df2 = ref_cnt_percentile_rank(df1)
-    cdf_graph(df=df2, fig_title=args.title, filename=args.output)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,147 @@
 from utils.filecache import FileCache
+from utils.tracestats import trace_stats
+from utils.epochs import flush_epochs
+from utils.tracefile import columns_digest, columns_from_frame, load_columns
+from utils.traceio import read_trace
 import math, operator
-import pandas as pd
+import numpy as np
 import time
+import sys
+import os
+import random
+from utils.checkpoint import load_pickle, save_pickle
 
-def simulation(df, size, max_buffer, ratio):
+def simulation(df, size, max_buffer, ratio, verbose=True,
+               checkpoint=None, checkpoint_events=None, checkpoint_seconds=None):
     flush_dict = {}
     flush_rtime, flush_period, last_rtime, flush_cnt = 0, 5, 0, 0
+    start = 0
 
     #--------------------------------
+    columns = df if isinstance(df, dict) else columns_from_frame(df)    # DataFrame or utils.tracefile columns
     s = FileCache(max_cache_size=size, write_buffer_max=max_buffer, ratio=ratio)
-    for index, row in df.iterrows():
-        if row[1] >= flush_period and (int(row[1] - flush_rtime) >= flush_period or int(row[1] - last_rtime) >= flush_period):
-            f = s.flush(cur_vtime=index, cur_rtime=flush_rtime+flush_period)
+    saving_list = ['s', 'index', 'flush_rtime', 'last_rtime', 'flush_cnt', 'flush_dict', 'random_state', 'config', 'finished']
+    if checkpoint is not None:
+        config = {'trace': columns_digest(columns), 'size': size, 'max_buffer': max_buffer, 'ratio': ratio}
+    if checkpoint is not None and os.path.exists(checkpoint):
+        try:
+            s, start, flush_rtime, last_rtime, flush_cnt, flush_dict, random_state, saved, finished = load_pickle(saving_list, checkpoint)
+        except KeyError:
+            raise ValueError(checkpoint + " was written by an older simulation.py; delete it to start over")
+        if saved != config:
+            raise ValueError(checkpoint + " belongs to another trace or configuration: " + str(saved))
+        random.setstate(random_state)    # FileCache.flush samples the flush order
+        if finished:    # kept from a completed run
+            if verbose:
+                print(s.stor_flush_cnt, s.stor_io_cnt, s.stor_io_bytes, len(s.write_buffer.cache), sep=",\t")
+            return s
+    ckpt_index, ckpt_time = start, time.monotonic()
+
+    # flush points are precomputed, so each flush epoch is replayed as one contiguous batch of references
+    flush_idx, _ = flush_epochs(columns['rtime'], flush_period)
+    vtimes, rtimes, operations, blknums, inodes = [columns[c].tolist() for c in ['vtime', 'rtime', 'operation', 'blocknum', 'inode']]
+    n = len(vtimes)
+
+    index = vtimes[start - 1] if start else -1
+    k = int(np.searchsorted(flush_idx, start))    # flushes at or after the resume point are still pending
+    pos = start
+    for end in flush_idx[k:].tolist() + [n]:
+        for i in range(pos, end):
+            index = vtimes[i]
+            s.reference(cur_vtime=index, cur_rtime=rtimes[i], operation=operations[i], blknum=blknums[i], inode=inodes[i])
+
+            last_rtime = rtimes[i]
+
+            if checkpoint is not None and ((checkpoint_events and i + 1 - ckpt_index >= checkpoint_events) or
+                                           (checkpoint_seconds and time.monotonic() - ckpt_time >= checkpoint_seconds)):
+                savings = {'s': s, 'index': i + 1, 'flush_rtime': flush_rtime, 'last_rtime': last_rtime,
+                           'flush_cnt': flush_cnt, 'flush_dict': flush_dict, 'random_state': random.getstate(),
+                           'config': config, 'finished': False}
+                save_pickle(savings, checkpoint)
+                ckpt_index, ckpt_time = i + 1, time.monotonic()
+
+        if end < n:
+            f = s.flush(cur_vtime=vtimes[end], cur_rtime=flush_rtime+flush_period)
             if f != -1:
                 flush_dict[flush_rtime+flush_period] = f
             flush_cnt += 1
-            flush_rtime = math.floor(row[1]) - (math.floor(row[1]) % flush_period)
-
-        s.reference(cur_vtime=index, cur_rtime=row[1], operation=row[3], blknum=row[4], inode=row[5])
-
-        last_rtime = row[1]
+            flush_rtime = math.floor(rtimes[end]) - (math.floor(rtimes[end]) % flush_period)
+            k += 1
+        pos = end
 
     f = s.flush(cur_vtime=index+1, cur_rtime=last_rtime)
     flush_cnt += 1
     if f != -1:
         flush_dict[last_rtime] = f
 
-    print(s.stor_flush_cnt, len(s.write_buffer.cache), sep=",\t")
+    if checkpoint is not None:    # finished: kept, so resuming a multi-ratio run skips this one
+        savings = {'s': s, 'index': n, 'flush_rtime': flush_rtime, 'last_rtime': last_rtime, 'flush_cnt': flush_cnt,
+                   'flush_dict': flush_dict, 'random_state': random.getstate(), 'config': config, 'finished': True}
+        save_pickle(savings, checkpoint)
+
+    if verbose:
+        print(s.stor_flush_cnt, s.stor_io_cnt, s.stor_io_bytes, len(s.write_buffer.cache), sep=",\t")
 
+    return s
 
-def simulation_run():
-    PATH = 'trace.csv'
-    df = pd.read_csv(PATH, header=None, skiprows=1)
-    SIZE, B_SIZE = len(df[4].unique()), len(df[df[3]=='write'][4].unique())
 
-    print("write buffer ratio,\tstorage write count,\twrite buffer block count")
+def inode_report(s, top=None, file=None):
+    # per-file write traffic: blocks written and storage I/Os after coalescing, most written inodes first
+    print("inode,\tblocks written,\tstorage I/O count", file=file)
+    for inode, (blocks, io_cnt) in sorted(s.inode_flush.items(), key=lambda x: (-x[1][0], x[0]))[:top]:
+        print(inode, blocks, io_cnt, sep=",\t", file=file)
+
+def load_trace(PATH):
+    # a converted trace (`aiot.py convert`) loads with numpy alone; a csv needs pandas
+    if PATH.endswith('.npz'):
+        return load_columns(PATH)
+
+    df = read_trace(PATH, header=None, skiprows=1)
+    return columns_from_frame(df), trace_stats(PATH)
+
+def simulation_run(PATH='trace.csv', profiler=None, checkpoint=None, checkpoint_events=None, checkpoint_seconds=None,
+                   inodes=None):
+    df, stats = load_trace(PATH)
+    SIZE, B_SIZE = stats['unique'], stats['unique_write']
+
+    print("write buffer ratio,\tstorage write count,\tstorage I/O count,\tstorage I/O bytes,\twrite buffer block count")
     for r in [i / 20 for i in range(1,11)]:
         print(r, end=",\t")
-        simulation(df, size=SIZE, max_buffer=B_SIZE, ratio=r)
+        s = simulation(df, size=SIZE, max_buffer=B_SIZE, ratio=r,
+                       checkpoint=None if checkpoint is None else checkpoint + '_' + str(r) + '.pkl',
+                       checkpoint_events=checkpoint_events, checkpoint_seconds=checkpoint_seconds)
+        if inodes is not None:
+            inode_report(s, top=inodes or None, file=sys.stderr)
+        if profiler is not None:
+            profiler.report(s, file=sys.stderr)
+            profiler.reset()
+
+def main(argv=None, prog=None):
+    # add parser
+    import argparse
+    parser = argparse.ArgumentParser(prog=prog)
+
+    parser.add_argument("--input", "-i", metavar='I', type=str,
+                        nargs='?', default='trace.csv', help='input file path (csv or converted .npz)')
+    parser.add_argument("--checkpoint", "-c", metavar='C', type=str, default=None,
+                        help='checkpoint path prefix; an existing checkpoint is resumed and finished ratios are reused')
+    parser.add_argument("--checkpoint-events", metavar='N', type=int, default=None, help='checkpoint every N events')
+    parser.add_argument("--checkpoint-seconds", metavar='M', type=float, default=None, help='checkpoint every M seconds')
+    parser.add_argument("--inodes", metavar='K', type=int, default=None,
+                        help='report the K inodes with the most blocks written of each run to stderr (0: all)')
+    parser.add_argument("--profile", action='store_true', help='report hot-path timings of each run to stderr')
+    parser.add_argument("--profile-memory", action='store_true', help='also trace memory with tracemalloc (slow)')
+    args = parser.parse_args(argv)
+
+    profiler = None
+    if args.profile or args.profile_memory:
+        from utils.profiler import Profiler
+        profiler = Profiler(trace_memory=args.profile_memory)
+        profiler.enable()
+
+    simulation_run(args.input, profiler=profiler, checkpoint=args.checkpoint,
+                   checkpoint_events=args.checkpoint_events, checkpoint_seconds=args.checkpoint_seconds,
+                   inodes=args.inodes)
 
 if __name__ == "__main__":
-    simulation_run()
+    main()
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import stat
+import sys
+import time
+from utils.filecache import FileCache
+
+def parse_event(line):
+    # same columns as trace.csv: index, time, pid, operation, blocknum, inode
+    fields = line.strip().split(',')
+    try:
+        return float(fields[1]), fields[3], int(fields[4]), int(fields[5])
+    except (IndexError, ValueError):    # header or bad line
+        return None
+
+async def read_events(reader, queue, batch_size, batch_timeout):
+    # asyncio.wait instead of wait_for: wait_for can swallow a cancel that races a finished readline
+    batch, readline = [], None
+    try:
+        while True:
+            if readline is None:
+                readline = asyncio.ensure_future(reader.readline())
+            done, _ = await asyncio.wait([readline], timeout=batch_timeout)
+            if done:
+                line, readline = readline.result(), None
+            else:
+                line = None    # trickling source: do not hold a partial batch back
+
+            if line == b'':    # EOF
+                break
+
+            if line is not None:
+                event = parse_event(line.decode('utf-8', errors='replace'))
+                if event is not None:
+                    batch.append(event)
+
+            if len(batch) >= batch_size or (line is None and len(batch)):
+                await queue.put(batch)    # blocks while the queue is full (backpressure)
+                batch = []
+    finally:
+        if readline is not None:
+            readline.cancel()
+
+    if len(batch):
+        await queue.put(batch)
+    await queue.put(None)
+
+async def consume_events(queue, s, state):
+    while True:
+        batch = await queue.get()
+        if batch is None:
+            break
+
+        for rtime, operation, blknum, inode in batch:
+            s.reference(cur_vtime=state['vtime'], cur_rtime=rtime, operation=operation, blknum=blknum, inode=inode)
+            state['vtime'] += 1
+            state['last_rtime'] = rtime
+
+        queue.task_done()
+
+async def flush_timer(s, state, flush_period):
+    while True:
+        await asyncio.sleep(flush_period)
+        s.flush(cur_vtime=state['vtime'], cur_rtime=state['last_rtime'])
+        state['flush_cnt'] += 1
+
+def print_metrics(s, state, queue):
+    elapsed = time.monotonic() - state['start']
+    print(round(elapsed, 1), state['vtime'], round(state['vtime'] / elapsed, 1) if elapsed else 0,
+          s.hit_cnt, s.miss_cnt, state['flush_cnt'], s.stor_flush_cnt, s.stor_io_cnt, queue.qsize(), sep=",\t", flush=True)
+
+async def metrics_timer(s, state, queue, interval):
+    while True:
+        await asyncio.sleep(interval)
+        print_metrics(s, state, queue)
+
+async def open_source(source):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=2**20)
+    protocol = asyncio.StreamReaderProtocol(reader)
+
+    mode = os.fstat(sys.stdin.fileno()).st_mode if source == '-' else os.stat(source).st_mode
+    if not (stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode) or (source == '-' and sys.stdin.isatty())):    # the pipe transport rejects regular files
+        raise ValueError(("stdin" if source == '-' else source) + " is not a pipe or socket; replay trace files with simulation.py")
+
+    if source == '-':
+        await loop.connect_read_pipe(lambda: protocol, sys.stdin.buffer)
+    elif stat.S_ISSOCK(mode):
+        reader, _ = await asyncio.open_unix_connection(source, limit=2**20)
+    else:
+        await loop.connect_read_pipe(lambda: protocol, open(source, 'rb', buffering=0))
+
+    return reader
+
+async def ingest(source, s, flush_period=5, batch_size=4096, queue_size=64, batch_timeout=0.5, metrics_interval=10):
+    queue = asyncio.Queue(maxsize=queue_size)
+    state = {'vtime': 0, 'last_rtime': 0, 'flush_cnt': 0, 'start': time.monotonic()}
+
+    reader = await open_source(source)
+    tasks = [asyncio.create_task(read_events(reader, queue, batch_size, batch_timeout)),
+             asyncio.create_task(consume_events(queue, s, state))]
+    timers = [asyncio.create_task(flush_timer(s, state, flush_period)),
+              asyncio.create_task(metrics_timer(s, state, queue, metrics_interval))]
+
+    print("elapsed,\tevents,\tevents/s,\thit count,\tmiss count,\tflush count,\tstorage write count,\tstorage I/O count,\tqueued batches")
+    try:
+        # a failed reader or consumer must not leave the other blocked on the queue
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for t in done:
+            t.result()    # re-raise
+    finally:
+        for t in tasks + timers:
+            t.cancel()
+
+    s.flush(cur_vtime=state['vtime'], cur_rtime=state['last_rtime'])
+    state['flush_cnt'] += 1
+    print_metrics(s, state, queue)
+
+    return s
+
+#----------------
+def main(argv=None, prog=None):
+    # add parser
+    import argparse
+    parser = argparse.ArgumentParser(prog=prog)
+
+    parser.add_argument("--input", "-i", metavar='I', type=str,
+                        nargs='?', default='-', help='FIFO or unix socket path (- for stdin)')
+    parser.add_argument("--cache-size", metavar='C', type=int, required=True, help='buffer cache size in blocks')
+    parser.add_argument("--buffer-size", metavar='B', type=int, default=None, help='write buffer size before ratio')
+    parser.add_argument("--ratio", "-r", metavar='R', type=float, default=0.25, help='write buffer ratio')
+    parser.add_argument("--flush-period", metavar='F', type=float, default=5, help='flush period in seconds')
+    parser.add_argument("--batch-size", metavar='N', type=int, default=4096, help='events per batch')
+    parser.add_argument("--queue-size", metavar='Q', type=int, default=64, help='max queued batches')
+    parser.add_argument("--metrics-interval", metavar='M', type=float, default=10, help='seconds between metric lines')
+    args = parser.parse_args(argv)
+
+    s = FileCache(max_cache_size=args.cache_size, write_buffer_max=args.buffer_size, ratio=args.ratio)
+    asyncio.run(ingest(args.input, s, flush_period=args.flush_period, batch_size=args.batch_size,
+                       queue_size=args.queue_size, metrics_interval=args.metrics_interval))
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 import json
+import os
+import pickle
 
 def save_json(savings, filename):
     try:
@@ -26,3 +28,25 @@ def load_json(saving_list, filename):
         savings.append(load[i])
 
     return tuple(savings)
+
+
+def save_pickle(savings, filename):
+    # binary checkpoint of whole objects; written aside and renamed so an interrupted save keeps the previous one
+    path = os.path.dirname(filename)
+    if path and not os.path.exists(path):
+        os.makedirs(path)
+
+    with open(filename + '.tmp', 'wb') as f:
+        pickle.dump(savings, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(filename + '.tmp', filename)
+
+def load_pickle(saving_list, filename):
+    with open(filename, 'rb') as f:
+        load = pickle.load(f)
+
+    savings = []
+
+    for i in saving_list:
+        savings.append(load[i])
+
+    return tuple(savings)
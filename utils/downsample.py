@@ -0,0 +1,43 @@
+import numpy as np
+
+MAX_POINTS = 20000
+
+def log_bin_scatter(y, max_points=MAX_POINTS):
+    '''
+    Downsample y[rank-1] over ranks 1..len(y) for a log-log scatter.
+    Ranks are grouped in log-spaced bins and each bin keeps its minimum and maximum point,
+    so the head is kept exactly and the vertical spread of the tail survives.
+    Returns (x, y) with at most about `max_points` points.
+    '''
+    y = np.asarray(y)
+    n = len(y)
+    if max_points is None or n <= max_points:
+        return np.arange(1, n + 1), y
+
+    edges = np.unique(np.geomspace(1, n + 1, max_points // 2 + 1).astype(np.int64)) - 1    # 0-based bin starts
+    starts = edges[:-1]
+    bin_id = np.repeat(np.arange(len(starts)), np.diff(edges))
+
+    # argmin/argmax per bin: sort by (bin, y) and take the first and the last element of each bin
+    order = np.lexsort((y[:edges[-1]], bin_id))
+    ends = np.append(starts[1:], edges[-1]) - 1
+    idx = np.unique(np.concatenate((order[starts], order[ends])))
+
+    return idx + 1, y[idx]
+
+def decimate_line(x, y, max_points=MAX_POINTS):
+    '''
+    Downsample a monotone line such as a CDF, keeping both extremes.
+    Half of the points are spaced linearly and half geometrically from the start,
+    so the steep head of a skewed CDF stays as detailed as the flat tail.
+    '''
+    x, y = np.asarray(x), np.asarray(y)
+    n = len(x)
+    if max_points is None or n <= max_points:
+        return x, y
+
+    idx = np.concatenate((np.linspace(0, n - 1, max_points // 2).astype(np.int64),
+                          np.geomspace(1, n, max_points // 2).astype(np.int64) - 1))
+    idx = np.unique(idx)
+
+    return x[idx], y[idx]
@@ -0,0 +1,120 @@
+import math
+import numpy as np
+# pandas is imported inside the analysis functions only, so the replay can use flush_epochs without it
+
+def flush_epochs(rtime, flush_period=5):
+    '''
+    Event positions where simulation.simulation flushes before referencing the event,
+    and the `cur_rtime` each of those flushes gets. Computed once per trace instead of
+    re-evaluating the flush condition on every event.
+    For time-sorted traces and an integral period, a flush happens exactly at the first event of
+    every later flush epoch floor(floor(t) / period); other traces take the event-by-event rule.
+    '''
+    rtime = np.asarray(rtime, dtype=np.float64)
+
+    if len(rtime) and rtime[0] >= 0 and float(flush_period).is_integer() and np.all(rtime[1:] >= rtime[:-1]):
+        epoch_id = np.floor(rtime) // flush_period
+        flush_idx = np.flatnonzero(np.diff(epoch_id, prepend=0) > 0)
+        prev_epoch = np.where(flush_idx > 0, epoch_id[np.maximum(flush_idx - 1, 0)], 0)
+        return flush_idx, (prev_epoch + 1) * flush_period
+
+    # same condition as the original replay loop
+    flush_idx, flush_rtime_list = [], []
+    flush_rtime, last_rtime = 0, 0
+    for i, t in enumerate(rtime.tolist()):
+        if t >= flush_period and (int(t - flush_rtime) >= flush_period or int(t - last_rtime) >= flush_period):
+            flush_idx.append(i)
+            flush_rtime_list.append(flush_rtime + flush_period)
+            flush_rtime = math.floor(t) - (math.floor(t) % flush_period)
+        last_rtime = t
+
+    return np.array(flush_idx, dtype=np.int64), np.array(flush_rtime_list, dtype=np.float64)
+
+def epoch_of_events(flush_idx, n):
+    # epoch number of every event: epoch k holds the events between the k-th and (k+1)-th flush
+    return np.searchsorted(flush_idx, np.arange(n), side='right')
+
+def epoch_range(flush_idx, n, epoch):
+    # [start, end) event positions of `epoch`, for seeking a replay or an analysis to it
+    bounds = np.concatenate(([0], flush_idx, [n]))
+    return int(bounds[epoch]), int(bounds[epoch + 1])
+
+def epoch_stats(df, flush_idx):
+    '''
+    Per-epoch statistics of a trace in simulation.py's positional layout, without a replay:
+    events, writes, unique dirty (written) blocks, rewrite ratio (share of writes that hit a block
+    already written in the same epoch) and the rtime span.
+    '''
+    import pandas as pd
+
+    epoch = epoch_of_events(flush_idx, len(df))
+    write = (df[3] == 'write').to_numpy()
+
+    per_epoch = pd.DataFrame({'epoch': epoch, 'rtime': df[1].to_numpy(), 'write': write})
+    stats = per_epoch.groupby('epoch').agg(events=('write', 'size'), writes=('write', 'sum'),
+                                           rtime_start=('rtime', 'min'), rtime_end=('rtime', 'max'))
+
+    writes = pd.DataFrame({'epoch': epoch[write], 'blocknum': df[4].to_numpy()[write]})
+    stats['dirty_blocks'] = writes.drop_duplicates().groupby('epoch').size()
+    stats['dirty_blocks'] = stats['dirty_blocks'].fillna(0).astype('int64')
+    stats['rewrite_ratio'] = np.where(stats['writes'] > 0, 1 - stats['dirty_blocks'] / stats['writes'].clip(lower=1), 0)
+
+    return stats
+
+def write_epoch_gaps(df, flush_idx):
+    '''
+    Flush-epoch gaps between successive writes to the same block, from one stable sort by
+    block (events are already in time order). Gap 0 is a rewrite within the same epoch.
+    Returns (sorted blocknums, their write epochs, gap to the previous write or -1 for the first one).
+    '''
+    write = (df[3] == 'write').to_numpy()
+    blknum = df[4].to_numpy()[write]
+    epoch = epoch_of_events(flush_idx, len(df))[write]
+
+    order = np.argsort(blknum, kind='stable')
+    blknum, epoch = blknum[order], epoch[order]
+
+    gap = np.diff(epoch, prepend=0)
+    first = np.ones(len(blknum), dtype=bool)
+    first[1:] = blknum[1:] != blknum[:-1]
+    gap[first] = -1
+
+    return blknum, epoch, gap
+
+def gap_distribution(gap, max_gap=None):
+    # count of each inter-epoch gap (>= 1) and its cumulative share of all inter-epoch rewrites
+    import pandas as pd
+
+    counts = np.bincount(gap[gap >= 1])
+    counts = counts[1:] if len(counts) > 1 else np.zeros(0, dtype=np.int64)
+    cumulative = np.cumsum(counts) / max(counts.sum(), 1)
+
+    dist = pd.DataFrame({'gap': np.arange(1, len(counts) + 1), 'count': counts, 'cumulative': cumulative})
+    return dist if max_gap is None else dist.head(max_gap)
+
+def suggest_window_size(gap, coverage=0.9):
+    # smallest history window (in flush epochs) that sees `coverage` of the inter-epoch rewrites
+    dist = gap_distribution(gap)
+    if len(dist) == 0:
+        return 1
+    return int(dist['gap'].iloc[int(np.searchsorted(dist['cumulative'].to_numpy(), coverage))])
+
+def write_periodicity(blknum, gap):
+    '''
+    Per-block write periodicity from `write_epoch_gaps`: writes, inter-epoch rewrites,
+    mean epoch gap and its coefficient of variation (0 for a perfectly periodic block)
+    '''
+    import pandas as pd
+
+    inter = gap >= 1
+    per_block = pd.DataFrame({'blocknum': blknum, 'writes': 1, 'rewrites': inter,
+                              'gap': np.where(inter, gap, 0), 'gap_sq': np.where(inter, gap, 0) ** 2})
+    per_block = per_block.groupby('blocknum').sum()
+
+    rewrites = per_block['rewrites'].clip(lower=1)
+    mean = per_block['gap'] / rewrites
+    std = np.sqrt((per_block['gap_sq'] / rewrites - mean ** 2).clip(lower=0))
+    per_block['mean_gap'] = np.where(per_block['rewrites'] > 0, mean, np.nan)
+    per_block['gap_cv'] = np.where(per_block['rewrites'] > 1, std / mean, np.nan)
+
+    return per_block.drop(columns=['gap', 'gap_sq'])
@@ -59,8 +59,9 @@ class FileBlock:
             return False
 #-------------------------------------------------------
 class NVM_FileBlock:
-    def __init__(self, blknum, last_ref_vtime=0, reference_cnt=0, inode=-1, history_bit=1):
+    def __init__(self, blknum, last_ref_vtime=0, reference_cnt=0, inode=-1, history_bit=1, write_cnt=0):
         self.addr = blknum
+        self.write_cnt = write_cnt    # carried back to the buffer cache when the block is read again
         self.last_ref_vtime = last_ref_vtime    # updated_time
         self.modified_bit = 0    # dirty bit
         self.reference_cnt = reference_cnt
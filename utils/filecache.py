@@ -3,9 +3,26 @@ import copy
 import random
 from .fileblock import FileBlock, NVM_FileBlock
 
+def coalesce_extents(blknums):
+    '''
+    Merge block numbers into contiguous extents
+    >>> coalesce_extents([7, 3, 4, 5, 9])
+    [(3, 3), (7, 1), (9, 1)]
+    '''
+    extents = []
+    for blknum in sorted(blknums):
+        if len(extents) and extents[-1][0] + extents[-1][1] == blknum:
+            extents[-1] = (extents[-1][0], extents[-1][1] + 1)
+        else:
+            extents.append((blknum, 1))
+
+    return extents
+
+#--------------------------------------------------------------------------------
 class FileCache():
-    def __init__(self, max_cache_size, ratio, write_buffer_max=None):
+    def __init__(self, max_cache_size, ratio, write_buffer_max=None, block_size=4096):
         self.max_cache_size = max_cache_size
+        self.block_size = block_size
         self.buffer_cache = BufferCache(max_cache_size=max_cache_size)
         if write_buffer_max is None:
             self.write_buffer = WriteBuffer(max_cache_size=int(round(ratio*max_cache_size, 0)))
@@ -17,6 +34,11 @@ class FileCache():
         self.stor_flush_cnt = 0
         self.w_buffer_write_cnt = 0
 
+        self.stor_io_cnt = 0     # storage writes after extent coalescing
+        self.stor_io_bytes = 0
+        self.inode_flush = {}    # {inode: [written blocks, stor_io_cnt]}
+        self.stor_pending = {}   # {inode: set(blknum)} evicted in the current write-back
+
     def reference(self, cur_vtime, cur_rtime, operation, blknum, inode):
         if blknum in self.buffer_cache.cache: # cache hit
             self.hit_cnt += 1
@@ -37,12 +59,12 @@ class FileCache():
             if self.buffer_cache.is_full():
                 victim_block = self.buffer_cache.evict()
                 if victim_block.modified_bit:
-                    self.sync_to_NVM(victim_block, cur_vtime, cur_rtime)
+                    self.sync_to_NVM([victim_block], cur_vtime, cur_rtime)
 
             self.buffer_cache.reference(cur_vtime, operation=operation, blknum=blknum, inode=inode, write_cnt=write_cnt)
 
     def sync_to_NVM(self, flushed, cur_vtime, cur_rtime):
-        not_in = [f for f in flushed if f not in set(self.write_buffer.cache.keys())]
+        not_in = [f for f in flushed if f.addr not in self.write_buffer.cache]
         in_cache = set(flushed) - set(not_in)
 
         for file_block in in_cache:
@@ -56,6 +78,7 @@ class FileCache():
         for i in range(evicted_num):
             victim_block = self.write_buffer.evict()
             self.stor_flush_cnt += 1 # flush
+            self.stor_pending.setdefault(victim_block.inode, set()).add(victim_block.addr)
             # Flush data from the write buffer, so do not change the modified bit in the buffer cache
             # self.buffer_cache.cache[victim_block.addr].set_modified(0)
         for file_block in not_in:
@@ -70,6 +93,22 @@ class FileCache():
 
             if (victim_block is not None):
                 self.stor_flush_cnt += 1 # flush
+                self.stor_pending.setdefault(victim_block.inode, set()).add(victim_block.addr)
+
+        self.stor_write()
+
+    def stor_write(self):
+        # Blocks evicted by one write-back reach storage together, so contiguous blocks of a file become one I/O
+        for inode, blknums in self.stor_pending.items():
+            extents = coalesce_extents(blknums)
+            self.stor_io_cnt += len(extents)
+            self.stor_io_bytes += len(blknums) * self.block_size
+
+            per_inode = self.inode_flush.setdefault(inode, [0, 0])
+            per_inode[0] += len(blknums)
+            per_inode[1] += len(extents)
+
+        self.stor_pending = {}
 
     def flush(self, cur_vtime, cur_rtime):
         self.write_buffer.vtime += 1
@@ -117,7 +156,7 @@ class BufferCache:
                 return
             else:
                 _ = self.replacement_priority.pop(idx)
-                self.replacement_priority.insert(0, blknum)
+                self.replacement_priority.insert(0, file_block)
                 return
 
         else:
@@ -213,13 +252,14 @@ class WriteBuffer():
         victim = None
 
         current_while_cnt = 0
+        last_loop = self.shadow_hit_freq[-1] if len(self.shadow_hit_freq) else None    # none before the first flush
 
         while self.main_heap:
             self.while_cnt += 1; current_while_cnt += 1
 
             evicted = self.main_heap[0]
 
-            if evicted.is_same_loop(self.shadow_hit_freq[-1]) or (evicted.last_ref_vtime == self.vtime and evicted.history_bit % 2 == 1):
+            if evicted.is_same_loop(last_loop) or (evicted.last_ref_vtime == self.vtime and evicted.history_bit % 2 == 1):
                 if (len(current_second) and current_second[-1].reference_cnt < evicted.reference_cnt) or (current_while_cnt >= 5 or self.while_cnt >= 50):
                     victim = heapq.heappop(self.main_heap) #evicted
                     break
@@ -286,7 +326,7 @@ class WriteBuffer():
             updates = self.shadow_cache.pop(blknum)
             updates.set_reference(self.vtime, set_reference=True, window_size=self.window_size, decay=self.shadow_hit_freq)
             # for decay
-            if (self.shadow_hit_freq[-1] == float("inf")) and (updates.reference_cnt >= 1):
+            if len(self.shadow_hit_freq) and (self.shadow_hit_freq[-1] == float("inf")) and (updates.reference_cnt >= 1):
                 self.shadow_hit_freq[-1] = copy.deepcopy(updates)
             if len(self.cache) >= self.max_cache_size:
                 victim = self.evict()
@@ -298,7 +338,8 @@ class WriteBuffer():
 
         else:
             victim = None
-            updates = NVM_FileBlock(blknum=blknum, last_ref_vtime=self.vtime, reference_cnt=1, inode=inode, history_bit=1)
+            updates = NVM_FileBlock(blknum=blknum, last_ref_vtime=self.vtime, reference_cnt=1, inode=inode, history_bit=1,
+                                    write_cnt=write_cnt)
             if len(self.cache) >= self.max_cache_size:
                 victim = self.evict()
             # push new file_block
@@ -0,0 +1,146 @@
+import functools
+import sys
+import time
+import tracemalloc
+from . import filecache
+
+# hot paths of the replay; wrappers are installed only by `enable()`, so a disabled profiler costs nothing
+HOT_PATHS = {
+    filecache.FileCache: ['reference', 'sync_to_NVM', 'flush'],
+    filecache.BufferCache: ['reference', 'evict'],
+    filecache.WriteBuffer: ['reference', 'evict', 'heap_siftup', 'heap_siftdown'],
+}
+
+def owned_bytes(roots, seen):
+    # deep size of `roots`, skipping objects already in `seen` (shared between structures)
+    total, stack = 0, list(roots)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set)):
+            stack.extend(obj)
+        elif hasattr(obj, '__dict__'):
+            stack.append(obj.__dict__)
+    return total
+
+class MethodStat:
+    def __init__(self, name):
+        self.name = name
+        self.call_cnt = 0      # including recursive calls
+        self.outer_cnt = 0     # timed (outermost) calls
+        self.cum_time = 0      # ns
+        self.max_time = 0
+        self.hist = {}         # {log2(ns) bucket: count}
+        self.mem_delta = 0     # bytes, only with tracemalloc
+        self.depth = 0
+
+    def record(self, elapsed, mem):
+        self.outer_cnt += 1
+        self.cum_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        bucket = elapsed.bit_length()
+        self.hist[bucket] = self.hist.get(bucket, 0) + 1
+        self.mem_delta += mem
+
+    def percentile(self, p):
+        target = p * self.outer_cnt
+        seen = 0
+        for bucket in sorted(self.hist):
+            seen += self.hist[bucket]
+            if seen >= target:
+                return min(1 << bucket, self.max_time)    # upper bound of the bucket
+        return 0
+
+class Profiler:
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stats = {}    # {'Class.method': MethodStat}
+        self.originals = []
+
+    def wrap(self, cls, name):
+        method = getattr(cls, name)
+        stat = self.stats.setdefault(cls.__name__ + '.' + name, MethodStat(cls.__name__ + '.' + name))
+        trace_memory = self.trace_memory
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            stat.call_cnt += 1
+            if stat.depth:    # recursion, e.g. lazy aging in heap_siftdown: already timed by the outer call
+                return method(*args, **kwargs)
+
+            stat.depth += 1
+            mem = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+            start = time.perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                if trace_memory:
+                    mem = tracemalloc.get_traced_memory()[0] - mem
+                stat.record(elapsed, mem)
+                stat.depth -= 1
+
+        self.originals.append((cls, name, method))
+        setattr(cls, name, timed)
+
+    def enable(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        for cls, names in HOT_PATHS.items():
+            for name in names:
+                self.wrap(cls, name)
+
+    def disable(self):
+        for cls, name, method in reversed(self.originals):
+            setattr(cls, name, method)
+        self.originals = []
+
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def reset(self):
+        for name, stat in self.stats.items():
+            depth = stat.depth
+            stat.__init__(name)
+            stat.depth = depth
+
+    def memory_per_structure(self, s):
+        # bytes owned by each structure of the FileCache `s`; sized by ownership, since an evicted shadow block
+        # keeps its WriteBuffer.reference allocation site. The tracemalloc total of the cache modules is a cross-check
+        wb, seen = s.write_buffer, set()
+        memory = {'buffer_cache bytes': owned_bytes([s.buffer_cache.cache, s.buffer_cache.replacement_priority], seen),
+                  'write_buffer bytes': owned_bytes([wb.cache, wb.main_heap, wb.second_list, wb.shadow_hit_freq], seen),
+                  'shadow_cache bytes': owned_bytes([wb.shadow_cache], seen),
+                  'buffer_cache blocks': len(s.buffer_cache), 'write_buffer blocks': len(wb),
+                  'shadow_cache blocks': len(wb.shadow_cache)}
+
+        traced = tracemalloc.take_snapshot().statistics('filename')
+        memory['traced bytes (filecache.py, fileblock.py)'] = sum(
+            stat.size for stat in traced if stat.traceback[0].filename.endswith(('filecache.py', 'fileblock.py')))
+        return memory
+
+    def report(self, s=None, file=None):
+        print("method,\tcalls,\touter calls,\tcum ms,\tavg us,\tp50 us,\tp99 us,\tmax us" +
+              (",\tmem delta KiB" if self.trace_memory else ""), file=file)
+        for name, stat in sorted(self.stats.items(), key=lambda x: -x[1].cum_time):
+            if not stat.call_cnt:
+                continue
+            row = [name, stat.call_cnt, stat.outer_cnt, round(stat.cum_time / 1e6, 1),
+                   round(stat.cum_time / stat.outer_cnt / 1e3, 2),
+                   round(stat.percentile(0.5) / 1e3, 2), round(stat.percentile(0.99) / 1e3, 2),
+                   round(stat.max_time / 1e3, 2)]
+            if self.trace_memory:
+                row.append(round(stat.mem_delta / 1024, 1))
+            print(*row, sep=",\t", file=file)
+
+        if self.trace_memory and s is not None:
+            for name, value in self.memory_per_structure(s).items():
+                print(name, value, sep=",\t", file=file)
@@ -0,0 +1,28 @@
+# Frozen reference copy of utils/recency.py used as the oracle by equivalence.py; do not optimize
+class LRUCache(object):
+    def __init__(self):
+        self.cache = []
+
+    def __len__(self):
+        return len(self.cache)
+
+    def get(self):
+        ref_table = self.cache
+        return ref_table
+
+    def set(self, ref_table):
+        self.cache = ref_table
+
+    def reference(self, ref_address):
+        if ref_address in self.cache:
+            rank = self.cache.index(ref_address)
+            if rank == 0:
+                return rank
+            else:
+                _ = self.cache.pop(rank)
+                self.cache.insert(0, ref_address)
+                return rank
+
+        else:
+            self.cache.insert(0, ref_address)
+            return -1
\ No newline at end of file
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+CACHE_DIR = '.result_cache'
+CACHE_MAX_BYTES = 2 * 1024**3
+
+def trace_digest(path, sample_cnt=64, sample_size=65536):
+    '''
+    Identify a trace by its size and a digest of `sample_cnt` evenly spaced chunks, so hashing
+    a multi-GB trace takes milliseconds. The first and last chunks are always sampled.
+    '''
+    size = os.path.getsize(path)
+    h = hashlib.sha256(str(size).encode())
+
+    with open(path, 'rb') as f:
+        if size <= sample_cnt * sample_size:
+            h.update(f.read())
+        else:
+            step = (size - sample_size) // (sample_cnt - 1)
+            for i in range(sample_cnt):
+                f.seek(i * step)
+                h.update(f.read(sample_size))
+
+    return h.hexdigest()
+
+def cache_key(trace_path, analysis, params):
+    key = {'trace': trace_digest(trace_path), 'analysis': analysis, 'params': params}
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+def cache_load(key, cache_dir=CACHE_DIR):
+    filename = os.path.join(cache_dir, key + '.npz')
+    try:
+        with np.load(filename, allow_pickle=False) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+    except (FileNotFoundError, OSError, ValueError):    # missing or partially written entry
+        return None
+
+    os.utime(filename)    # mtime is the LRU clock
+    return arrays
+
+def cache_save(key, arrays, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+
+    filename = os.path.join(cache_dir, key + '.npz')
+    tmp_filename = filename + '.tmp.npz'
+    np.savez(tmp_filename, **arrays)
+    os.replace(tmp_filename, filename)
+
+    cache_evict(cache_dir, max_bytes)
+
+def cache_evict(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.npz') and not name.endswith('.tmp.npz'):
+            st = os.stat(os.path.join(cache_dir, name))
+            entries.append((st.st_mtime, st.st_size, name))
+
+    # drop least recently used entries, but always keep the newest one
+    entries.sort(reverse=True)
+    total = sum(e[1] for e in entries)
+    while total > max_bytes and len(entries) > 1:
+        _, size, name = entries.pop()
+        os.remove(os.path.join(cache_dir, name))
+        total -= size
+
+def memoize(trace_path, analysis, params, compute, cache_dir=CACHE_DIR):
+    '''
+    Return the dict of arrays `compute()` produces for (trace, analysis, params),
+    computing and storing it only on a cache miss. `cache_dir=None` disables the cache.
+    '''
+    if cache_dir is None:
+        return compute()
+
+    key = cache_key(trace_path, analysis, params)
+    arrays = cache_load(key, cache_dir)
+    if arrays is None:
+        arrays = compute()
+        cache_save(key, arrays, cache_dir)
+
+    return arrays
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+class HeavyHitters:
+    '''
+    Misra-Gries summary with at most `k` counters, the mergeable form of Space-Saving.
+    Chunks are merged with `update(counts)`: counters are added and, past `k`, the (k+1)-th
+    largest count is subtracted from every counter. For any block the true count lies in
+    [estimate, estimate + error], with error <= total / (k + 1); blocks that are not kept
+    have a true count <= error.
+    '''
+    def __init__(self, k):
+        self.k = k
+        self.counts = pd.Series(dtype='int64')    # {blocknum: estimated count}
+        self.total = 0
+        self.error = 0
+
+    def update(self, counts):
+        self.total += int(counts.sum())
+        merged = self.counts.add(counts, fill_value=0).astype('int64')
+
+        if len(merged) > self.k:
+            threshold = int(merged.nlargest(self.k + 1).iloc[-1])
+            merged = merged[merged > threshold] - threshold
+            self.error += threshold
+
+        self.counts = merged
+
+    def candidates(self):
+        return self.counts.index.to_numpy()
+
+class DistinctCounter:
+    '''
+    K-minimum-values estimate of the number of unique blocks; exact below `k` blocks,
+    relative standard error about 1 / sqrt(k - 2) above.
+    '''
+    def __init__(self, k=4096):
+        self.k = k
+        self.mins = np.empty(0, dtype=np.uint64)
+
+    @staticmethod
+    def hash(blknums):
+        # splitmix64 finalizer
+        x = np.asarray(blknums).astype(np.uint64)
+        with np.errstate(over='ignore'):
+            x = (x ^ (x >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+            x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+        return x ^ (x >> np.uint64(31))
+
+    def update(self, blknums):
+        h = np.union1d(self.mins, self.hash(blknums))
+        self.mins = h[:self.k]
+
+    def estimate(self):
+        if len(self.mins) < self.k:
+            return len(self.mins)
+        return int(round((self.k - 1) / (float(self.mins[-1]) / 2**64)))
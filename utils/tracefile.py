@@ -0,0 +1,29 @@
+import hashlib
+import numpy as np
+
+# numpy-only trace columns, so replay workers do not import pandas
+def columns_from_frame(df):
+    # positional layout of simulation.py: 1 rtime, 3 operation, 4 blocknum, 5 inode
+    return {'vtime': df.index.to_numpy(dtype=np.int64), 'rtime': df[1].to_numpy(dtype=np.float64),
+            'operation': df[3].to_numpy(dtype=str), 'blocknum': df[4].to_numpy(dtype=np.int64),
+            'inode': df[5].to_numpy(dtype=np.int64)}
+
+def columns_digest(columns):
+    # content digest of the event columns, e.g. to tie a checkpoint to the trace it replays
+    digest = hashlib.sha1()
+    for name in sorted(columns):
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(columns[name]).tobytes())
+    return digest.hexdigest()
+
+def save_columns(filename, columns):
+    write = columns['operation'] == 'write'
+    np.savez(filename, unique=len(np.unique(columns['blocknum'])),
+             unique_write=len(np.unique(columns['blocknum'][write])), **columns)
+
+def load_columns(filename):
+    with np.load(filename, allow_pickle=False) as npz:
+        columns = {name: npz[name] for name in npz.files}
+
+    stats = {'unique': int(columns.pop('unique')), 'unique_write': int(columns.pop('unique_write'))}
+    return columns, stats
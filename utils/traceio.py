@@ -0,0 +1,157 @@
+import io
+import queue
+import threading
+
+COMPRESSED_SUFFIXES = ['.gz', '.xz', '.zst', '.zstd']
+BLOCK_SIZE = 1 << 20
+
+def strip_compression(path):
+    # 'trace.csv.gz' -> 'trace.csv'
+    for suffix in COMPRESSED_SUFFIXES:
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+def open_trace(path):
+    # binary file object of the decompressed trace, chosen by file suffix
+    if path.endswith('.gz'):
+        import gzip
+        return gzip.open(path, 'rb')
+    elif path.endswith('.xz'):
+        import lzma
+        return lzma.open(path, 'rb')
+    elif path.endswith('.zst') or path.endswith('.zstd'):
+        try:
+            from compression import zstd    # Python >= 3.14
+            return zstd.open(path, 'rb')
+        except ImportError:
+            pass
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("reading .zst traces needs Python >= 3.14 or the `zstandard` package")
+        return zstandard.open(path, 'rb')
+    else:
+        return open(path, 'rb')
+
+#-----
+class Pipeline:
+    '''
+    Bounded queue between a producer thread and the consumer. After `stop`, `put` gives up and
+    `get` ends the stream, so an abandoned reader does not leave a thread blocked on either side.
+    '''
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stopped = threading.Event()
+
+    def put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if self.stopped.is_set():
+                    return None
+        if isinstance(item, BaseException):    # re-raise producer errors in the consumer
+            raise item
+        return item
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self, produce):
+        # run `produce(put)` in a daemon thread, then close the stream with None (or the error)
+        def target():
+            try:
+                produce(self.put)
+                self.put(None)
+            except BaseException as e:
+                self.put(e)
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        return thread
+
+class QueueReader(io.RawIOBase):
+    # file object over the decompressed blocks of a Pipeline, for the csv parser
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.block = b''
+        self.eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.block and not self.eof:
+            block = self.pipeline.get()
+            if block is None:
+                self.eof = True
+            else:
+                self.block = block
+
+        n = min(len(buffer), len(self.block))
+        buffer[:n] = self.block[:n]
+        self.block = self.block[n:]
+        return n
+
+def decompressed_stream(path, prefetch_blocks=16):
+    # decompress in a background thread; the returned reader sees plain csv bytes
+    pipeline = Pipeline(prefetch_blocks)
+
+    def produce(put):
+        with open_trace(path) as f:
+            while True:
+                block = f.read(BLOCK_SIZE)
+                if not block or not put(block):
+                    break
+
+    pipeline.run(produce)
+    return io.BufferedReader(QueueReader(pipeline), buffer_size=BLOCK_SIZE), pipeline
+
+def read_trace_chunks(path, chunksize=1000000, prefetch=4, **read_csv_kwargs):
+    '''
+    Iterate DataFrame chunks of a plain or compressed (gzip/xz/zstd) trace.
+    Decompression and csv parsing each run in their own background thread, linked by bounded
+    queues, so they overlap with each other and with the work done on the previous chunk.
+    '''
+    import pandas as pd
+
+    chunks = Pipeline(prefetch)
+    stream, blocks = (decompressed_stream(path) if strip_compression(path) != path else (path, None))
+
+    def produce(put):
+        with pd.read_csv(stream, chunksize=chunksize, **read_csv_kwargs) as reader:
+            for chunk in reader:
+                if not put(chunk):
+                    break
+
+    chunks.run(produce)
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        chunks.stop()
+        if blocks is not None:
+            blocks.stop()
+
+def read_trace(path, **read_csv_kwargs):
+    # whole trace as one DataFrame, decompressed and parsed through `read_trace_chunks`
+    import pandas as pd
+
+    chunks = list(read_trace_chunks(path, **read_csv_kwargs))
+    if len(chunks) == 0:
+        raise pd.errors.EmptyDataError("no events in " + path)
+    return pd.concat(chunks) if len(chunks) > 1 else chunks[0]
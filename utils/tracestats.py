@@ -0,0 +1,59 @@
+import os
+import numpy as np
+from .resultcache import trace_digest
+from .traceio import read_trace_chunks
+
+STATS_VERSION = 2    # bump when the sidecar contents change, so older sidecars are recomputed
+
+def compute_trace_stats(path, flush_period=5, chunksize=1000000):
+    # columns by position, as in simulation.py: 1 rtime, 3 operation, 4 blocknum
+    blocks = {'read': np.empty(0, dtype=np.int64), 'write': np.empty(0, dtype=np.int64)}
+    all_blocks = np.empty(0, dtype=np.int64)    # every operation, as len(df[4].unique())
+    events = {'read': 0, 'write': 0}
+    epochs = np.empty(0, dtype=np.int64)
+    n_events, rtime_min, rtime_max = 0, float('inf'), float('-inf')
+
+    for chunk in read_trace_chunks(path, header=None, skiprows=1, usecols=[1, 3, 4], chunksize=chunksize):
+        rtime = chunk[1].to_numpy()
+        n_events += len(chunk)
+        rtime_min, rtime_max = min(rtime_min, rtime.min()), max(rtime_max, rtime.max())
+        epochs = np.union1d(epochs, np.floor(rtime / flush_period).astype(np.int64))
+        all_blocks = np.union1d(all_blocks, chunk[4].to_numpy(dtype=np.int64))
+
+        for op in blocks:
+            op_blocks = chunk[4][chunk[3] == op].to_numpy(dtype=np.int64)
+            events[op] += len(op_blocks)
+            blocks[op] = np.union1d(blocks[op], op_blocks)
+
+    return {'events': n_events, 'events_read': events['read'], 'events_write': events['write'],
+            'unique': len(all_blocks),
+            'unique_read': len(blocks['read']), 'unique_write': len(blocks['write']),
+            'rtime_min': float(rtime_min), 'rtime_max': float(rtime_max),
+            'flush_period': flush_period, 'flush_epochs': len(epochs),
+            'blocks': all_blocks}    # block-id dictionary: dense id = index
+
+def trace_stats(path, flush_period=5):
+    '''
+    Per-trace statistics, read from the `<trace>.stats.npz` sidecar and
+    computed in one streaming pass only when the sidecar is missing or stale
+    '''
+    sidecar = path + '.stats.npz'
+    digest = trace_digest(path)
+
+    if os.path.exists(sidecar):
+        with np.load(sidecar, allow_pickle=False) as npz:
+            stats = {name: npz[name] for name in npz.files}
+        if (stats.get('version', 1) == STATS_VERSION and str(stats['digest']) == digest
+                and stats['flush_period'] == flush_period):
+            return {name: (value if value.ndim else value.item()) for name, value in stats.items()}
+
+    stats = compute_trace_stats(path, flush_period=flush_period)
+    stats['digest'] = digest
+    stats['version'] = STATS_VERSION
+    try:
+        np.savez(sidecar + '.tmp.npz', **stats)
+        os.replace(sidecar + '.tmp.npz', sidecar)
+    except OSError:    # read-only trace directory: use the stats without a sidecar
+        pass
+
+    return stats